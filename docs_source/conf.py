@@ -23,7 +23,12 @@ project = 'phenopype'
 project_copyright = '2022, Moritz Lürig'
 author = 'Moritz Lürig'
 
-from phenopype._version import __version__ as version
+## read version from file instead of importing the package
+import re
+VERSIONFILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "phenopype", "_version.py")
+with open(VERSIONFILE, "rt") as version_file:
+    version = re.search(r"^__version__ = ['\"]([^'\"]*)['\"]", version_file.read(), re.M).group(1)
+del version_file
 release = version
 
 
@@ -38,6 +43,7 @@ release = version
 # ones.
 extensions = [
     'sphinx.ext.autodoc',
+    'autoapi.extension',
     'sphinx.ext.coverage',
     'sphinx.ext.napoleon',
     'sphinx.ext.githubpages',
@@ -49,6 +55,15 @@ extensions = [
 ]
 
 autodoc_member_order = 'bysource'
+
+# api pages are parsed from source by sphinx-autoapi (no package imports,
+# cacheable between incremental builds) and rendered via the autoapi
+# directives in api/*.rst
+autoapi_type = 'python'
+autoapi_dirs = ['../phenopype']
+autoapi_keep_files = True
+autoapi_generate_api_docs = False
+autoapi_add_toctree_entry = False
 suppress_warnings = ['autosectionlabel.*']
 
 # The master toctree document.
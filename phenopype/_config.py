@@ -7,4 +7,5 @@ active_model_path = None
 active_model = None
 models = {}
 template_path_current = None
-template_loaded_current = None
\ No newline at end of file
+template_loaded_current = None
+reference_template_features = None
@@ -9,9 +9,9 @@ from dataclasses import make_dataclass
 import math
 
 from phenopype import __version__
+from phenopype import _config
 from phenopype import settings
 from phenopype import utils_lowlevel
-from phenopype.core import segmentation
 
 #%% functions
 
@@ -44,6 +44,7 @@ def blur(
     # =============================================================================
     # setup
 
+    kernel_size = int(kernel_size)
     if kernel_size % 2 == 0:
         kernel_size = kernel_size + 1
         if settings.flag_verbose:
@@ -55,11 +56,17 @@ def blur(
     if method == "averaging":
         blurred = cv2.blur(image, (kernel_size, kernel_size))
     elif method == "gaussian":
-        blurred = cv2.GaussianBlur(image, (kernel_size, kernel_size), 0)
+        kernel = utils_lowlevel._get_gaussian_kernel(kernel_size)
+        blurred = cv2.sepFilter2D(image, -1, kernel, kernel)
     elif method == "median":
         blurred = cv2.medianBlur(image, kernel_size)
     elif method == "bilateral":
-        blurred = cv2.bilateralFilter(image, kernel_size, sigma_color, sigma_space)
+        if cv2.ocl.haveOpenCL() and cv2.ocl.useOpenCL():
+            blurred = cv2.bilateralFilter(
+                cv2.UMat(image), kernel_size, sigma_color, sigma_space
+            ).get()
+        else:
+            blurred = cv2.bilateralFilter(image, kernel_size, sigma_color, sigma_space)
 
     # =============================================================================
     # return
@@ -252,18 +259,28 @@ def detect_mask(
             - param2: accumulator threshold - smaller = more false positives
             - min_radius: minimum circle radius
             - max_radius: maximum circle radius
+            - method: "gradient" (default) or "alt" - the latter uses 
+              HOUGH_GRADIENT_ALT (OpenCV >= 4.3), which is faster and more 
+              accurate with many small circles. the image is pre-smoothed and 
+              dp, param1 and param2 default to 1.5, 300 and 0.9 (param2 is 
+              then a circle "perfectness" score between 0 and 1)
+            - expected_circles: if set, param2 is not used as is, but bisected 
+              to the lowest value that returns this number of circles (the 
+              value found is stored as param2 in the annotation settings)
             
         The default is:
             
         .. code-block:: python
         
             {
+                "method":"gradient",
                 "dp":1,
                  "min_dist":50,
                  "param1":200,
                  "param2":100,
                  "min_radius":0,
-                 "max_radius":0
+                 "max_radius":0,
+                 "expected_circles":None
                  }
 
     Returns
@@ -297,48 +314,109 @@ def detect_mask(
     image_resized = utils_lowlevel._resize_image(image, resize)
 
     circle_args_exec = {
+        "method": "gradient",
         "dp": 1,
         "min_dist": 50,
         "param1": 200,
         "param2": 100,
         "min_radius": 0,
         "max_radius": 0,
+        "expected_circles": None,
     }
 
+    if circle_args.get("method") == "alt":
+        circle_args_exec.update({"dp": 1.5, "param1": 300, "param2": 0.9})
+
     circle_args_exec.update(circle_args)
 
     # =============================================================================
     # execute
 
     if shape == "circle":
-        circles = cv2.HoughCircles(
-            image_resized,
-            cv2.HOUGH_GRADIENT,
-            dp=max(int(circle_args_exec["dp"] * resize), 1),
-            minDist=int(circle_args_exec["min_dist"] * resize),
-            param1=int(circle_args_exec["param1"] * resize),
-            param2=int(circle_args_exec["param2"] * resize),
-            minRadius=int(circle_args_exec["min_radius"] * resize),
-            maxRadius=int(circle_args_exec["max_radius"] * resize),
-        )
+        if circle_args_exec["method"] == "alt":
+            if not hasattr(cv2, "HOUGH_GRADIENT_ALT"):
+                raise AttributeError(
+                    "HOUGH_GRADIENT_ALT requires OpenCV >= 4.3 - use method \"gradient\""
+                )
+            hough_method = cv2.HOUGH_GRADIENT_ALT
+            image_hough = cv2.GaussianBlur(image_resized, (7, 7), 1.5)
+            hough_args = {
+                "dp": circle_args_exec["dp"],
+                "minDist": int(circle_args_exec["min_dist"] * resize),
+                "param1": circle_args_exec["param1"],
+                "minRadius": int(circle_args_exec["min_radius"] * resize),
+                "maxRadius": int(circle_args_exec["max_radius"] * resize),
+            }
+            param2 = circle_args_exec["param2"]
+            param2_range, param2_tol = (0.5, 0.99), 0.01
+        else:
+            hough_method = cv2.HOUGH_GRADIENT
+            image_hough = image_resized
+            hough_args = {
+                "dp": max(int(circle_args_exec["dp"] * resize), 1),
+                "minDist": int(circle_args_exec["min_dist"] * resize),
+                "param1": int(circle_args_exec["param1"] * resize),
+                "minRadius": int(circle_args_exec["min_radius"] * resize),
+                "maxRadius": int(circle_args_exec["max_radius"] * resize),
+            }
+            param2 = int(circle_args_exec["param2"] * resize)
+            param2_range, param2_tol = (10, 300), 2
+
+        expected_circles = circle_args_exec["expected_circles"]
+        if expected_circles:
+            
+            ## bisect for the lowest param2 that returns at most expected_circles; 
+            ## if the count jumps across the target, smooth more (on top of the
+            ## method's base smoothing) and try again.
+            ## the result closest to expected_circles is kept
+            best = None
+            image_hough_base = image_hough
+            for sigma in range(4):
+                if sigma > 0:
+                    image_hough = cv2.GaussianBlur(image_hough_base, (0, 0), sigma)
+                lo, hi = param2_range
+                while hi - lo > param2_tol:
+                    mid = (lo + hi) / 2
+                    if hough_method == cv2.HOUGH_GRADIENT:
+                        mid = int(mid)
+                    circles = cv2.HoughCircles(
+                        image_hough, hough_method, param2=mid, **hough_args
+                    )
+                    n_circles = 0 if circles is None else len(circles[0])
+                    if n_circles > expected_circles:
+                        lo = mid
+                    else:
+                        hi = mid
+                circles = cv2.HoughCircles(
+                    image_hough, hough_method, param2=hi, **hough_args
+                )
+                n_circles = 0 if circles is None else len(circles[0])
+                if best is None or abs(n_circles - expected_circles) < best[0]:
+                    best = (abs(n_circles - expected_circles), hi, circles)
+                if n_circles == expected_circles:
+                    break
+            param2, circles = best[1:]
+            
+            ## record the param2 that was used (in the units of circle_args)
+            if hough_method == cv2.HOUGH_GRADIENT:
+                circle_args_exec["param2"] = param2 / resize
+            else:
+                circle_args_exec["param2"] = param2
+            print("- param2 bisected to {}".format(circle_args_exec["param2"]))
+        else:
+            circles = cv2.HoughCircles(
+                image_hough, hough_method, param2=param2, **hough_args
+            )
 
         ## output conversion
-        circle_masks= []
+        circle_masks = []
         if circles is not None:
-            for idx, circle in enumerate(circles[0]):
+            for circle in circles[0]:
                 x, y, radius = circle / resize
-                mask = np.zeros(image.shape[:2], dtype=np.uint8)
-                mask = cv2.circle(mask, (x, y), radius, 255, -1)
-                mask_contours = segmentation.detect_contour(
-                    mask, retrieval="ext", approximation="KCOS", verbose=False,
-                )
-                ## add first coord to close circle and convert to mask notation 
                 circle_masks.append(
                     utils_lowlevel._convert_arr_tup_list(
-                        np.append(
-                            mask_contours["contour"]["a"]["data"][settings._contour_type][0],
-                            [mask_contours["contour"]["a"]["data"][settings._contour_type][0][0] ],
-                            axis=0,
+                        utils_lowlevel._calc_circle_polygon(
+                            x, y, radius, shape=image.shape
                         )
                     )
                 )
@@ -497,9 +575,7 @@ def create_reference(
 
     ## enter length
     points = gui.data[settings._coord_type]
-    distance_px = math.sqrt(
-        ((points[0][0] - points[1][0]) ** 2) + ((points[0][1] - points[1][1]) ** 2)
-    )
+    distance_px = math.hypot(points[0][0] - points[1][0], points[0][1] - points[1][1])
 
     ## enter distance
     gui = utils_lowlevel._GUI(
@@ -637,91 +713,103 @@ def detect_reference(
         )
     else:
         resize_factor = resize
-    image_resized = cv2.resize(
-        image, (0, 0), fx=1 * resize_factor, fy=1 * resize_factor
+    image_resized = utils_lowlevel._resize_image(
+        image, factor=resize_factor, interpolation="area"
     )
 
     # =============================================================================
     # execute function
 
     akaze = cv2.AKAZE_create()
-    kp1, des1 = akaze.detectAndCompute(template, None)
+
+    ## template features are reused as long as the template doesn't change
+    template_key = (template.shape, hash(template.tobytes()))
+    if (
+        _config.reference_template_features is not None
+        and _config.reference_template_features[0] == template_key
+    ):
+        kp1_pts, des1 = _config.reference_template_features[1:]
+    else:
+        kp1, des1 = akaze.detectAndCompute(template, None)
+        kp1_pts = cv2.KeyPoint_convert(kp1)
+        _config.reference_template_features = (template_key, kp1_pts, des1)
+
     kp2, des2 = akaze.detectAndCompute(image_resized, None)
+    kp2_pts = cv2.KeyPoint_convert(kp2)
     matcher = cv2.DescriptorMatcher_create(cv2.DescriptorMatcher_BRUTEFORCE_HAMMING)
 
+    ## keep only good matches (ratio test)
     good = []
+    if not any(des.__class__.__name__ == "NoneType" for des in [des1, des2]):
+        matches = [m for m in matcher.knnMatch(des1, des2, 2) if len(m) == 2]
+        good = [m for m, n in matches if m.distance < 0.7 * n.distance]
+    n_good = len(good)
+
+    # find and transpose coordinates of matches
+    if n_good >= min_matches:
+
+        ## find homography betweeen detected keypoints
+        query_idx = np.fromiter((m.queryIdx for m in good), np.intp, n_good)
+        train_idx = np.fromiter((m.trainIdx for m in good), np.intp, n_good)
+        src_pts = kp1_pts[query_idx].reshape(-1, 1, 2)
+        dst_pts = kp2_pts[train_idx].reshape(-1, 1, 2)
+        M, mask = cv2.findHomography(src_pts, dst_pts, cv2.RANSAC, 5.0)
+
+        ## transform boundary box of template
+        rect_old = np.array(
+            [
+                [[0, 0]],
+                [[0, template.shape[0]]],
+                [[template.shape[1], template.shape[0]]],
+                [[template.shape[1], 0]],
+            ],
+            dtype=np.float32,
+        )
 
-    while True:
-
-        if not des2.__class__.__name__ == "NoneType":
-            matches = matcher.knnMatch(des1, des2, 2)
-        else:
-            break
-
-        # keep only good matches
-        for m, n in matches:
-            if m.distance < 0.7 * n.distance:
-                good.append(m)
-
-        # find and transpose coordinates of matches
-        if len(good) >= min_matches:
-
-            ## find homography betweeen detected keypoints
-            src_pts = np.float32([kp1[m.queryIdx].pt for m in good]).reshape(-1, 1, 2)
-            dst_pts = np.float32([kp2[m.trainIdx].pt for m in good]).reshape(-1, 1, 2)
-            M, mask = cv2.findHomography(src_pts, dst_pts, cv2.RANSAC, 5.0)
-
-            ## transform boundary box of template
-            rect_old = np.array(
-                [
-                    [[0, 0]],
-                    [[0, template.shape[0]]],
-                    [[template.shape[1], template.shape[0]]],
-                    [[template.shape[1], 0]],
-                ],
-                dtype=np.float32,
-            )
-
-            rect_new = cv2.perspectiveTransform(rect_old, M) / resize_factor
+        rect_homogeneous = np.hstack(
+            [rect_old.reshape(-1, 2), np.ones((4, 1), np.float32)]
+        )
+        rect_projected = rect_homogeneous @ M.T
+        rect_new = (
+            rect_projected[:, :2] / rect_projected[:, 2:3]
+        ).reshape(-1, 1, 2) / resize_factor
 
-            # calculate template diameter
-            (x, y), radius = cv2.minEnclosingCircle(rect_new.astype(np.int32))
-            diameter_new = radius * 2
+        # calculate template diameter
+        (x, y), radius = cv2.minEnclosingCircle(rect_new.astype(np.int32))
+        diameter_new = radius * 2
 
-            # calculate transformed diameter
-            (x, y), radius = cv2.minEnclosingCircle(rect_old.astype(np.int32))
-            diameter_old = radius * 2
+        # calculate transformed diameter
+        (x, y), radius = cv2.minEnclosingCircle(rect_old.astype(np.int32))
+        diameter_old = radius * 2
 
-            ## calculate ratios
-            diameter_ratio = diameter_new / diameter_old
-            px_ratio_detected = round(diameter_ratio * px_ratio_template, 3)
+        ## calculate ratios
+        diameter_ratio = diameter_new / diameter_old
+        px_ratio_detected = round(diameter_ratio * px_ratio_template, 3)
 
-            ## feedback
-            print("---------------------------------------------------")
-            print("Reference card found with {} keypoint matches:".format(len(good)))
-            print(
-                "template image has {} pixel per {}.".format(
-                    round(px_ratio_template, 3), unit
-                )
-            )
-            print(
-                "current image has {} pixel per mm.".format(round(px_ratio_detected, 3))
+        ## feedback
+        print("---------------------------------------------------")
+        print("Reference card found with {} keypoint matches:".format(n_good))
+        print(
+            "template image has {} pixel per {}.".format(
+                round(px_ratio_template, 3), unit
             )
-            print("= {} %% of template image.".format(round(diameter_ratio * 100, 3)))
-            print("---------------------------------------------------")
-
-            ## create mask from new coordinates
-            rect_new = rect_new.astype(int)
-            coord_list = utils_lowlevel._convert_arr_tup_list(rect_new)
-            coord_list[0].append(coord_list[0][0])
+        )
+        print(
+            "current image has {} pixel per mm.".format(round(px_ratio_detected, 3))
+        )
+        print("= {} %% of template image.".format(round(diameter_ratio * 100, 3)))
+        print("---------------------------------------------------")
 
-            break
+        ## create mask from new coordinates
+        rect_new = rect_new.astype(int)
+        coord_list = utils_lowlevel._convert_arr_tup_list(rect_new)
+        coord_list[0].append(coord_list[0][0])
 
-    if len(good) == 0:
+    else:
 
         ## feedback
         print("---------------------------------------------------")
-        print("Reference card not found - %d keypoint matches:" % len(good))
+        print("Reference card not found - %d keypoint matches:" % n_good)
         print('Setting "current reference" to None')
         print("---------------------------------------------------")
         px_ratio_detected = None
@@ -729,15 +817,18 @@ def detect_reference(
 
     ## do histogram equalization
     if flags.equalize:
-        detected_rect_mask = np.zeros(image.shape, np.uint8)
-        cv2.fillPoly(
-            detected_rect_mask, [np.array(rect_new)], utils_lowlevel._get_bgr("white")
-        )
+        ## only allocate and fill the mask within the bounding box of the card
         (rx, ry, rw, rh) = cv2.boundingRect(np.array(rect_new))
-        detected_rect_mask = np.ma.array(
-            data=image[ry : ry + rh, rx : rx + rw],
-            mask=detected_rect_mask[ry : ry + rh, rx : rx + rw],
+        x1, y1 = min(rx + rw, image.shape[1]), min(ry + rh, image.shape[0])
+        rx, ry = max(rx, 0), max(ry, 0)
+        image_crop = image[ry:y1, rx:x1]
+        detected_rect_mask = np.zeros(image_crop.shape, np.uint8)
+        cv2.fillPoly(
+            detected_rect_mask,
+            [np.array(rect_new) - np.array([rx, ry])],
+            utils_lowlevel._get_bgr("white"),
         )
+        detected_rect_mask = np.ma.array(data=image_crop, mask=detected_rect_mask)
         image = utils_lowlevel._equalize_histogram(image, detected_rect_mask, template)
         print("histograms equalized")
 
@@ -805,28 +896,19 @@ def decompose_image(
         print("- single channel image supplied - no decomposition possible")
         pass
     elif len(image.shape) == 3:
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-
         if channel in ["grayscale", "gray"]:
-            image = gray
-        elif channel in ["blue", "b"]:
-            image = image[:, :, 0]
-        elif channel in ["green", "g"]:
-            image = image[:, :, 1]
-        elif channel in ["red", "r"]:
-            image = image[:, :, 2]
-        elif channel in ["hue", "h"]:
-            image = hsv[:, :, 0]
-        elif channel in ["saturation", "sat", "s"]:
-            image = hsv[:, :, 1]
-        elif channel in ["value", "v"]:
-            image = hsv[:, :, 2]
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        elif channel in settings._channel_bgr_idx:
+            image = cv2.extractChannel(image, settings._channel_bgr_idx[channel])
+        elif channel in settings._channel_hsv_idx:
+            image = cv2.extractChannel(
+                cv2.cvtColor(image, cv2.COLOR_BGR2HSV),
+                settings._channel_hsv_idx[channel],
+            )
         elif channel == "raw":
             pass
         else:
-            print("- don't know how to handle channel {}".format(channel))
-            return
+            raise ValueError("unknown channel {!r}".format(channel))
 
         if verbose:
             print("- decompose image: using {} channel".format(str(channel)))
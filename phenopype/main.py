@@ -1577,7 +1577,7 @@ class Project:
         if framework=="ml-morph":
 
             annotation_type = settings._landmark_type
-            df_summary = pd.DataFrame()
+            df_list = []
             file_path_save = os.path.join(training_data_path, "landmarks_ml-morph_" + tag + ".csv")
 
             if not utils_lowlevel._overwrite_check_file(file_path_save, flags.overwrite):
@@ -1664,10 +1664,10 @@ class Project:
                         coord_row.append(y_coord)
                     colnames.append("X" + str(idx2))
                     colnames.append("Y" + str(idx2))
-                df = pd.DataFrame([filename] + coord_row).transpose()
-                df_summary = pd.concat([df_summary, df])
+                df_list.append(pd.DataFrame([filename] + coord_row).transpose())
                 
             ## save dataframe
+            df_summary = pd.concat(df_list)
             df_summary.set_axis(colnames, axis=1, inplace=True)
             df_summary.to_csv(file_path_save, index=False)
             
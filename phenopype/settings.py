@@ -162,6 +162,18 @@ opencv_window_flags = {
     "GUInorm": cv2.WINDOW_GUI_NORMAL,
 }
 
+## channel name -> channel index
+_channel_bgr_idx = {
+    "blue": 0, "b": 0,
+    "green": 1, "g": 1,
+    "red": 2, "r": 2,
+}
+_channel_hsv_idx = {
+    "hue": 0, "h": 0,
+    "saturation": 1, "sat": 1, "s": 1,
+    "value": 2, "v": 2,
+}
+
 #%% annotation definitions
 
 ## gui data
@@ -359,6 +359,7 @@ class motion_tracker(object):
 
         ## initialize
         self.df = pd.DataFrame()
+        frame_df_list = []
         self.idx1, self.idx2 = (0, 0)
         self.capture = cv2.VideoCapture(self.path)
         self.start_frame = int(self.start * self.fps)
@@ -496,9 +497,7 @@ class motion_tracker(object):
                         )
                         self.frame_df.insert(2, "mins", mins)
                         self.frame_df.insert(3, "secs", secs)
-                        self.df = self.df.append(
-                            self.frame_df, ignore_index=True, sort=False
-                        )
+                        frame_df_list.append(self.frame_df)
 
                 ## select canvas
                 if "methods" in vars(self):
@@ -556,6 +555,10 @@ class motion_tracker(object):
             self.writer.release()
         cv2.destroyAllWindows()
 
+        ## collect frame data in one go
+        if len(frame_df_list) > 0:
+            self.df = pd.concat(frame_df_list, ignore_index=True, sort=False)
+
         ## return DataFrame
         debug =  kwargs.get("debug", False)
         
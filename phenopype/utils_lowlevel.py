@@ -14,9 +14,9 @@ import ruamel.yaml
 from ruamel.yaml.constructor import SafeConstructor
 from ruamel.yaml import YAML
 
-from functools import wraps
+from functools import lru_cache, wraps
  
-from math import sqrt
+from math import acos, ceil, pi, sqrt
 from pathlib import Path
 from PIL import Image
 from stat import S_IWRITE
@@ -1589,6 +1589,45 @@ def _overwrite_check_dir(path, overwrite):
 def _calc_distance_2point(x1,x2,y1,y2):
     return sqrt((x2-x1)**2 + (y2-y1)**2)
     
+@lru_cache(maxsize=64)
+def _calc_circle_unit_vectors(n):
+    theta = np.linspace(0, 2 * np.pi, n, endpoint=False, dtype=np.float32)
+    cos_t, sin_t = np.cos(theta), np.sin(theta)
+    cos_t.setflags(write=False)
+    sin_t.setflags(write=False)
+    return cos_t, sin_t
+
+def _calc_circle_polygon(x, y, radius, shape=None):
+    """
+    Sample a closed polygon along a circle perimeter (first point repeated at
+    the end) - avoids rasterizing the circle and re-detecting its contour. 
+    The number of vertices keeps the chord error below half a pixel, and 
+    consecutive duplicates (from rounding or clipping) are dropped. If an 
+    image shape is supplied, coordinates are clipped to the image.
+    """
+    if radius > 0.5:
+        n = max(8, ceil(pi / acos(1 - 0.5 / radius)))
+    else:
+        n = 8
+    cos_t, sin_t = _calc_circle_unit_vectors(n)
+    pts = np.empty((n, 2), dtype=np.int32)
+    pts[:, 0] = np.rint(x + radius * cos_t)
+    pts[:, 1] = np.rint(y + radius * sin_t)
+    if shape is not None:
+        np.clip(pts[:, 0], 0, shape[1] - 1, out=pts[:, 0])
+        np.clip(pts[:, 1], 0, shape[0] - 1, out=pts[:, 1])
+    keep = np.any(pts != np.roll(pts, 1, axis=0), axis=1)
+    if not keep.any():
+        keep[0] = True
+    pts = pts[keep]
+    return np.vstack([pts, pts[:1]]).reshape(-1, 1, 2)
+
+@lru_cache(maxsize=32)
+def _get_gaussian_kernel(kernel_size, sigma=0):
+    kernel = cv2.getGaussianKernel(kernel_size, sigma)
+    kernel.setflags(write=False)
+    return kernel
+
 def _calc_distance_polyline(coords):
     distances = []
     for i in range(len(coords)-1):
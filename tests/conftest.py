@@ -1,7 +1,9 @@
 #%% modules
 
+import cv2
 import os
 import mock
+import numpy as np
 import pytest
 import shutil 
 from urllib.request import urlopen
@@ -86,6 +88,14 @@ def image():
     image = pp.load_image(pytest.image_path)
     return image
 
+
+@pytest.fixture(scope="session")
+def image_circles():
+    image = np.zeros((600, 600), dtype=np.uint8)
+    for (x, y, radius) in [(150, 150, 60), (400, 400, 90), (450, 120, 40)]:
+        cv2.circle(image, (x, y), radius, 255, -1)
+    return cv2.GaussianBlur(image, (5, 5), 0)
+
     
 @pytest.fixture(scope="session")
 def mask_polygon():
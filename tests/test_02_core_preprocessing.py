@@ -1,5 +1,6 @@
 #%% modules
 
+import cv2
 import pytest
 import numpy as np
 
@@ -47,6 +48,45 @@ def test_detect_mask(image):
 
     assert len(annotations) > 0
     
+def test_detect_mask_expected_circles(image_circles):
+    
+    annotations = pp.preprocessing.detect_mask(
+        image_circles, 
+        circle_args={"expected_circles": 3, "min_dist": 30}, 
+        resize=0.5,
+        )
+    
+    assert annotations["mask"]["a"]["data"]["n"] == 3
+    
+    ## the recorded param2 reproduces the detection without bisection
+    param2 = annotations["mask"]["a"]["settings"]["circle_args"]["param2"]
+    annotations = pp.preprocessing.detect_mask(
+        image_circles, 
+        circle_args={"param2": param2, "min_dist": 30}, 
+        resize=0.5,
+        )
+    
+    assert annotations["mask"]["a"]["data"]["n"] == 3
+    
+@pytest.mark.skipif(
+    not hasattr(cv2, "HOUGH_GRADIENT_ALT"), reason="requires OpenCV >= 4.3"
+    )
+def test_detect_mask_alt(image_circles):
+    
+    annotations = pp.preprocessing.detect_mask(
+        image_circles, 
+        circle_args={"method": "alt"}, 
+        )
+
+    assert annotations["mask"]["a"]["data"]["n"] == 3
+    
+def test_detect_mask_alt_unavailable(image_circles, monkeypatch):
+    
+    monkeypatch.delattr(cv2, "HOUGH_GRADIENT_ALT", raising=False)
+    
+    with pytest.raises(AttributeError):
+        pp.preprocessing.detect_mask(image_circles, circle_args={"method": "alt"})
+    
 def test_create_reference(reference_created, settings):
     
     image = pp.load_image(pytest.reference_image_path)
@@ -96,7 +136,8 @@ def test_detect_reference(image, reference_created, settings):
     
 def test_decompose_image(image):
     
-    mod = pp.preprocessing.decompose_image(image, "bier")
+    with pytest.raises(ValueError):
+        pp.preprocessing.decompose_image(image, "bier")
     mod = pp.preprocessing.decompose_image(image, "raw", invert=True)
     mod = pp.preprocessing.decompose_image(image, "v")
     mod = pp.preprocessing.decompose_image(mod, "v")
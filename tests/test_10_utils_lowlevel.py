@@ -16,3 +16,18 @@ def test_load_yaml():
 
     pp.utils_lowlevel._show_yaml(y)
 
+
+
+def test_calc_circle_polygon():
+
+    polygon = pp.utils_lowlevel._calc_circle_polygon(500, 500, 90)
+    assert polygon.shape[1:] == (1, 2)
+    assert (polygon[0] == polygon[-1]).all()
+    assert len(polygon) == 31
+    assert not (polygon[1:] == polygon[:-1]).all(axis=2).any()
+
+    polygon = pp.utils_lowlevel._calc_circle_polygon(10, 10, 50, shape=(100, 80))
+    assert (polygon[0] == polygon[-1]).all()
+    assert polygon[:, 0, 0].min() == 0 and polygon[:, 0, 0].max() <= 79
+    assert polygon[:, 0, 1].min() == 0 and polygon[:, 0, 1].max() <= 99
+    assert not (polygon[1:] == polygon[:-1]).all(axis=2).any()